@@ -1,226 +1,223 @@
 import plotly.graph_objects as go
+import plotly.io as pio
 import streamlit as st
 import numpy as np
 import pandas as pd
-from utils import COLORS, get_icelandic_month
+from utils import COLORS, ICELANDIC_MONTHS_ARR, df_fingerprint
 
-def add_cost_bars(fig, df, prefix):
-    """
-    Add stacked cost bars to a Plotly figure.
-    Used by both electricity and hot water charts.
-    """
-    # Create a custom hover template that shows the total cost with Icelandic date format
-    hovertemplate = 'Dagsetning: %{customdata[1]}<br>Heildarkostnaður: %{customdata[0]:,.0f} kr.<extra></extra>'
-    
-    # Create formatted Icelandic dates for hover
-    icelandic_dates = []
-    for d in df["date"]:
-        day = d.day
-        month = get_icelandic_month(d.month)
-        icelandic_dates.append(f"{day}. {month} {d.year}")
-    
-    # Create array of [total_cost, icelandic_date] for each point
-    hover_data = list(zip(df[f"{prefix}_total"], icelandic_dates))
-    
-    # Add the cost components as stacked bars
-    fig.add_trace(go.Bar(
-        x=df["date"], 
-        y=df["cost_fixed"], 
-        name="Fastur kostnaður", 
-        marker_color=COLORS["mid_gray"],
-        customdata=hover_data,  # Pass total cost and formatted date for hover
-        hovertemplate=hovertemplate
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=df["date"], 
-        y=df["cost_equalization"], 
-        name="Jöfnunargjald", 
-        marker_color=COLORS["mid_light_gray"],
-        customdata=hover_data,  # Pass total cost and formatted date for hover
-        hovertemplate=hovertemplate
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=df["date"], 
-        y=df[f"{prefix}_tax"], 
-        name="Skattar", 
-        marker_color=COLORS["dark_gray"],
-        customdata=hover_data,  # Pass total cost and formatted date for hover
-        hovertemplate=hovertemplate
-    ))
-    
-    # Use different colors for electricity vs water usage
-    color = COLORS["greenstraum"] if prefix == "elec" else COLORS["dark_blue"]
-    
-    fig.add_trace(go.Bar(
-        x=df["date"], 
-        y=df[f"{prefix}_usage_cost"], 
-        name="Notkun", 
-        marker_color=color,
-        customdata=hover_data,  # Pass total cost and formatted date for hover
-        hovertemplate=hovertemplate
-    ))
-    
-    return fig
+# Serialize figures with orjson, which encodes numpy arrays natively
+pio.json.config.default_engine = "orjson"
+
+# Stacked cost components, bottom to top: (column, legend name, color key)
+COST_COMPONENTS = (
+    ("cost_fixed", "Fastur kostnaður", "mid_gray"),
+    ("cost_equalization", "Jöfnunargjald", "mid_light_gray"),
+    ("{prefix}_tax", "Skattar", "dark_gray"),
+    ("{prefix}_usage_cost", "Notkun", "usage"),
+)
 
-def add_traffic_light_background(fig, y_max, is_electricity=True):
-    """Add traffic light background zones to a chart"""
-    # Set colors based on chart type
-    title_color = COLORS["red"] if is_electricity else COLORS["dark_blue"]
-    
-    # Add colored background rectangles (traffic light zones)
-    green_max = 0.55
-    yellow_max = 0.8
+# Color keys for the "usage" component, different for electricity vs water
+USAGE_COLORS = {"elec": "greenstraum", "water": "dark_blue"}
 
-    fig.add_shape(
+# Traffic light background zones, as fractions of the plot height
+GREEN_MAX = 0.55
+YELLOW_MAX = 0.8
+
+# Traffic light background rects in paper coordinates, independent of the data
+_TRAFFIC_SHAPES = tuple(
+    dict(
         type="rect",
-        x0=0, y0=0, x1=1, y1=y_max * green_max,
-        xref="paper", yref="y",
-        fillcolor=COLORS["light_green_bg"],
-        line_width=0,
+        x0=0, y0=y0, x1=1, y1=y1,
+        xref="paper", yref="paper",
+        fillcolor=COLORS[color],
+        line=dict(width=0),
         layer="below"
     )
-    
-    fig.add_shape(
-        type="rect",
-        x0=0, y0=y_max * green_max, x1=1, y1=y_max * yellow_max,
-        xref="paper", yref="y",
-        fillcolor=COLORS["light_yellow_bg"],
-        line_width=0,
-        layer="below"
+    for y0, y1, color in (
+        (0, GREEN_MAX, "light_green_bg"),
+        (GREEN_MAX, YELLOW_MAX, "light_yellow_bg"),
+        (YELLOW_MAX, 1, "light_red_bg"),
     )
+)
+
+# Static template with the traffic light background, built and validated once at import
+TRAFFIC_LIGHT_TEMPLATE = go.layout.Template(layout=go.Layout(shapes=_TRAFFIC_SHAPES))
+pio.templates["veitur_traffic"] = TRAFFIC_LIGHT_TEMPLATE
+
+# Cost figures skip validation, which is where template names get resolved,
+# so resolve it on top of the active default template (Streamlit's) once here
+TRAFFIC_LIGHT_LAYOUT = {
+    "template": pio.templates.merge_templates(pio.templates.default, "veitur_traffic").to_plotly_json(),
+    "paper_bgcolor": "rgba(255,255,255,0.2)",
+    "legend": {
+        "orientation": "h",
+        "yanchor": "bottom",
+        "y": 1,
+        "xanchor": "right",
+        "x": 1
+    },
+}
+
+# Plotly config for charts that need no hover, zoom or mode bar
+STATIC_CHART_CONFIG = {"staticPlot": True, "displayModeBar": False}
+
+# Time grain radio options
+_TIME_GRAIN_KEYS = ("daily", "weekly", "monthly")
+_TIME_GRAIN_LABELS = {
+    "daily": "Daglegt",
+    "weekly": "Vikulegt",
+    "monthly": "Mánaðarlegt"
+}
+_TIME_GRAIN_INDEX = {k: i for i, k in enumerate(_TIME_GRAIN_KEYS)}
+
+def cost_bar_traces(df, prefix):
+    """
+    Build the stacked cost bars as plain trace dicts.
+    Used by both electricity and hot water charts.
+    """
+    # Create a custom hover template that shows the total cost with Icelandic date format
+    hovertemplate = 'Dagsetning: %{customdata[1]}<br>Heildarkostnaður: %{customdata[0]:,.0f} kr.<extra></extra>'
     
-    fig.add_shape(
-        type="rect",
-        x0=0, y0=y_max * yellow_max, x1=1, y1=y_max,
-        xref="paper", yref="y",
-        fillcolor=COLORS["light_red_bg"],
-        line_width=0,
-        layer="below"
-    )
+    # Create formatted Icelandic dates for hover (vectorized)
+    dates = df["date"]
+    days = dates.dt.day.to_numpy().astype(str)
+    months = ICELANDIC_MONTHS_ARR[dates.dt.month.to_numpy()]
+    years = dates.dt.year.to_numpy().astype(str)
+    icelandic_dates = np.char.add(np.char.add(np.char.add(days, ". "), np.char.add(months, " ")), years)
+    
+    # Create one array of [total_cost, icelandic_date] for each point,
+    # attached only to the top bar so the hover payload is sent once
+    customdata = np.empty((len(df), 2), dtype=object)
+    customdata[:, 0] = df[f"{prefix}_total"].to_numpy()
+    customdata[:, 1] = icelandic_dates
+    
+    # All cost components as one (N, 4) matrix, one column per stacked bar, kept in
+    # the data's float32 so the bars are serialized as 4-byte floats
+    columns = [column.format(prefix=prefix) for column, _, _ in COST_COMPONENTS]
+    components = np.asfortranarray(df[columns].to_numpy(dtype=np.float32))
+    x = dates.to_numpy()
+    
+    # The cost components as stacked bars
+    traces = [
+        {
+            "type": "bar",
+            "x": x,
+            "y": components[:, i],
+            "name": name,
+            "marker": {"color": COLORS[USAGE_COLORS[prefix]] if color == "usage" else COLORS[color]},
+            "hoverinfo": "skip",
+        }
+        for i, (_, name, color) in enumerate(COST_COMPONENTS)
+    ]
     
-    # Update layout with common settings
-    fig.update_layout(
-        paper_bgcolor="rgba(255,255,255,0.2)",
-        # title_font_color=title_color,
-        # legend_title_font_color=COLORS["dark_gray"],
-        # legend_title="Kostnaðarliðir",
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1,
-            xanchor="right",
-            x=1
-        )
-    )
+    # The top bar carries the hover for the whole stack
+    usage_trace = traces[-1]
+    usage_trace.pop("hoverinfo")
+    usage_trace["customdata"] = customdata  # Pass total cost and formatted date for hover
+    usage_trace["hovertemplate"] = hovertemplate
     
-    return fig
+    return traces
 
-def add_average_lines(fig, df, prefix, y_max):
-    """Add average comparison lines to a chart"""
+def average_line_traces(df, prefix):
+    """Build average comparison line traces as plain trace dicts"""
     # Calculate average for the period
     avg = df[f"{prefix}_total"].mean()
     
-    # Add average lines (simulated comparisons)
+    # Average lines (simulated comparisons)
     # Neighborhood average (slightly higher than user)
     neighborhood_avg = avg * 1.15
     
     # Home type average (slightly lower than user)
     home_type_avg = avg * 0.9
     
-    # Add average line for neighborhood
-    fig.add_trace(go.Scatter(
-        x=[df["date"].min(), df["date"].max()],
-        y=[neighborhood_avg, neighborhood_avg],
-        mode="lines",
-        name="Meðaltal hverfis",
-        line=dict(color=COLORS["mid_gray"], width=2, dash="dashdot"),
-    ))
-    
-    # Add average line for home type
-    fig.add_trace(go.Scatter(
-        x=[df["date"].min(), df["date"].max()],
-        y=[home_type_avg, home_type_avg],
-        mode="lines",
-        name="Meðaltal húsgerðar",
-        line=dict(color=COLORS["yellow"], width=2, dash="dash"),
-    ))
-    
-    return fig, avg, neighborhood_avg, home_type_avg
+    # Lines span the whole period; dates are sorted by the data producers
+    x = df["date"].to_numpy()
+    x_endpoints = x[[0, -1]]
+    
+    traces = [
+        # Average line for neighborhood
+        {
+            "type": "scatter",
+            "x": x_endpoints,
+            "y": [neighborhood_avg, neighborhood_avg],
+            "mode": "lines",
+            "name": "Meðaltal hverfis",
+            "line": {"color": COLORS["mid_gray"], "width": 2, "dash": "dashdot"},
+        },
+        # Average line for home type
+        {
+            "type": "scatter",
+            "x": x_endpoints,
+            "y": [home_type_avg, home_type_avg],
+            "mode": "lines",
+            "name": "Meðaltal húsgerðar",
+            "line": {"color": COLORS["yellow"], "width": 2, "dash": "dash"},
+        },
+    ]
+    
+    return traces, avg, neighborhood_avg, home_type_avg
+
+def build_cost_figure(traces, layout):
+    """Assemble a figure from plain trace and layout dicts, skipping Plotly's validation"""
+    return go.Figure({"data": traces, "layout": layout}, _validate=False)
 
+# The cost charts are cached as resources: st.cache_data would unpickle the figure
+# on every hit, which reruns Plotly's validation. The figure is shared, not copied,
+# so callers must not modify it. Keyed on df_fingerprint instead of hashing the frame
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: df_fingerprint})
 def create_electricity_chart(df):
     """Create the electricity cost chart"""
-    # Create figure
-    fig_cost_elec = go.Figure()
-    
-    # Calculate y-axis range for traffic light background
+    # Calculate y-axis range
     y_max = max(df["elec_total"].max() * 1.1, 1)  # Add 10% padding
     
-    # Create traffic light background
-    fig_cost_elec.update_layout(
-        barmode="stack",
-        title="Rafmagn – Daglegur kostnaður (kr.)",
-        xaxis_title="Dagsetning",
-        yaxis_title="kr.",
-        paper_bgcolor="rgba(255,255,255,0.5)",
-        title_font_color=COLORS["dark_gray"],
-        # legend_title_font_color=COLORS["dark_gray"],
-        # legend_title="Kostnaðarliðir",
-        yaxis=dict(range=[0, y_max]),
-        height=500,
-    )
+    layout = {
+        "barmode": "stack",
+        "title": {"text": "Rafmagn – Daglegur kostnaður (kr.)", "font": {"color": COLORS["dark_gray"]}},
+        "xaxis": {"title": {"text": "Dagsetning"}},
+        "yaxis": {"title": {"text": "kr."}, "range": [0, y_max]},
+        "height": 500,
+    }
     
     # Add traffic light background
-    fig_cost_elec = add_traffic_light_background(fig_cost_elec, y_max, is_electricity=True)
+    layout.update(TRAFFIC_LIGHT_LAYOUT)
     
-    # Add cost bars
-    fig_cost_elec = add_cost_bars(fig_cost_elec, df, "elec")
+    # Cost bars and average lines
+    traces = cost_bar_traces(df, "elec")
+    average_traces, avg_cost, neighborhood_avg, home_type_avg = average_line_traces(df, "elec")
     
-    # Add average lines
-    fig_cost_elec, avg_cost, neighborhood_avg, home_type_avg = add_average_lines(
-        fig_cost_elec, df, "elec", y_max
-    )
+    fig_cost_elec = build_cost_figure(traces + average_traces, layout)
     
     return fig_cost_elec, avg_cost, neighborhood_avg, home_type_avg
 
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: df_fingerprint})
 def create_water_chart(df):
     """Create the hot water cost chart"""
-    # Create figure
-    fig_cost_water = go.Figure()
-    
-    # Calculate y-axis range for traffic light background
-    y_max = max(df["water_total"].max() * 1.1, 1)  # Add 10% padding
-    
-    # Create traffic light background
-    fig_cost_water.update_layout(
-        barmode="stack",
-        title="Heitt vatn – Daglegur kostnaður (kr.)",
-        xaxis_title="Dagsetning",
-        yaxis_title="kr.",
-        paper_bgcolor="rgba(255,255,255,0.5)",
-        title_font_color=COLORS["dark_gray"],
-        # legend_title_font_color=COLORS["dark_gray"],
-        # legend_title="Kostnaðarliðir",
-        # yaxis=dict(range=[0, y_max]),
-        height=500,
-    )
+    layout = {
+        "barmode": "stack",
+        "title": {"text": "Heitt vatn – Daglegur kostnaður (kr.)", "font": {"color": COLORS["dark_gray"]}},
+        "xaxis": {"title": {"text": "Dagsetning"}},
+        "yaxis": {"title": {"text": "kr."}},
+        "height": 500,
+    }
     
     # Add traffic light background
-    fig_cost_water = add_traffic_light_background(fig_cost_water, y_max, is_electricity=False)
+    layout.update(TRAFFIC_LIGHT_LAYOUT)
     
-    # Add cost bars
-    fig_cost_water = add_cost_bars(fig_cost_water, df, "water")
+    # Cost bars and average lines
+    traces = cost_bar_traces(df, "water")
+    average_traces, avg_cost, neighborhood_avg, home_type_avg = average_line_traces(df, "water")
     
-    # Add average lines
-    fig_cost_water, avg_cost, neighborhood_avg, home_type_avg = add_average_lines(
-        fig_cost_water, df, "water", y_max
-    )
+    fig_cost_water = build_cost_figure(traces + average_traces, layout)
     
     return fig_cost_water, avg_cost, neighborhood_avg, home_type_avg
 
-def create_energy_breakdown_chart(df):
-    """Create a bar chart showing energy usage breakdown by category with icons"""
+@st.cache_resource(show_spinner=False)
+def create_energy_breakdown_chart(has_hot_tub, hot_tub_type, has_ev, ev_charging_time):
+    """Create a bar chart showing energy usage breakdown by category with icons
+    
+    Cached per process on the sidebar toggles, since those are the only inputs to the chart;
+    the figure is shared, not copied, so callers must not modify it.
+    """
     # Use the specific devices provided by the user
     devices = [
         "🚗 Rafbíll",
@@ -238,13 +235,13 @@ def create_energy_breakdown_chart(df):
     costs = [5800, 3200, 2750, 1800, 1750, 1500, 1200]
     
     # Check if electric hot tub is selected and add it to the chart with a high cost
-    if st.session_state.get('has_hot_tub', False) and st.session_state.get('hot_tub_type', 'geothermal') == 'electric':
+    if has_hot_tub and hot_tub_type == 'electric':
         devices.append("🛁 Heitur pottur")
         # Add a high cost for the electric hot tub (higher than EV)
         costs.append(2000)  # Higher than EV to make it stand out
     
     # Check sidebar toggles and adjust devices if needed
-    if not st.session_state.get('has_ev', False):
+    if not has_ev:
         # Remove EV if the toggle is off
         if "🚗 Rafbíll" in devices:
             idx = devices.index("🚗 Rafbíll")
@@ -254,7 +251,7 @@ def create_energy_breakdown_chart(df):
         # EV is enabled, check charging time
         if "🚗 Rafbíll" in devices:
             idx = devices.index("🚗 Rafbíll")
-            if st.session_state.get('ev_charging_time', 'day') == 'night':
+            if ev_charging_time == 'night':
                 # Night charging - cheaper rate (30% discount)
                 devices[idx] = "🚗 Rafbíll (nótt)"
                 costs[idx] = int(costs[idx] * 0.7)  # 30% cheaper at night
@@ -266,39 +263,42 @@ def create_energy_breakdown_chart(df):
     # Calculate total cost
     total_cost = sum(costs)
     
-    # Create figure with bar chart
-    fig = go.Figure()
-    
-    # Add bar chart with single color
-    fig.add_trace(go.Bar(
-        x=devices,
-        y=costs,
-        marker_color=COLORS["greenstraum"],
-        hovertemplate='%{x}: %{y:.0f} kr.<extra></extra>'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=f"Rafmagnsnotkun - Samtals: {total_cost:.0f} kr.",
-        # xaxis_title="Tæki",
-        yaxis_title="Kostnaður (kr.)",
-        height=500,
-        paper_bgcolor="rgba(255,255,255,0.5)",
-        title_font_color=COLORS["dark_gray"],
-        title_font_size=20,
-        xaxis_tickangle=-30,
-        plot_bgcolor='white',
-        font=dict(
-            family="Arial, sans-serif",
-            size=17,  # Larger font for axis labels and tick labels
-            color="black"
+    # Create figure with a single-color bar chart, passing the trace
+    # and layout in one construction instead of add_trace + update_layout
+    fig = go.Figure(
+        data=[go.Bar(
+            x=devices,
+            y=costs,
+            marker_color=COLORS["greenstraum"],
+            hovertemplate='%{x}: %{y:.0f} kr.<extra></extra>'
+        )],
+        layout=dict(
+            title=f"Rafmagnsnotkun - Samtals: {total_cost:.0f} kr.",
+            # xaxis_title="Tæki",
+            yaxis_title="Kostnaður (kr.)",
+            height=500,
+            paper_bgcolor="rgba(255,255,255,0.5)",
+            title_font_color=COLORS["dark_gray"],
+            title_font_size=20,
+            xaxis_tickangle=-30,
+            plot_bgcolor='white',
+            font=dict(
+                family="Arial, sans-serif",
+                size=17,  # Larger font for axis labels and tick labels
+                color="black"
+            )
         )
     )
     
     return fig
 
-def create_water_breakdown_chart(df):
-    """Create a bar chart showing hot water usage breakdown by category with icons"""
+@st.cache_resource(show_spinner=False)
+def create_water_breakdown_chart(has_hot_tub, hot_tub_type):
+    """Create a bar chart showing hot water usage breakdown by category with icons
+    
+    Cached per process on the hot tub toggles, since those are the only inputs to the chart;
+    the figure is shared, not copied, so callers must not modify it.
+    """
     # Use the specific water devices provided by the user
     water_devices = [
         "🔥 Ofnar",
@@ -312,7 +312,7 @@ def create_water_breakdown_chart(df):
     water_costs = [4550, 920, 460]
     
     # Check if geothermal hot tub is selected and add it to the chart with a high cost
-    if st.session_state.get('has_hot_tub', False) and st.session_state.get('hot_tub_type', 'geothermal') == 'geothermal':
+    if has_hot_tub and hot_tub_type == 'geothermal':
         # Add hot tub as the second item (after radiators) with a high cost
         water_devices.insert(1, "🛁 Heitur pottur")
         water_costs.insert(1, 1750)  # High cost for geothermal hot tub
@@ -320,32 +320,30 @@ def create_water_breakdown_chart(df):
     # Calculate the total water cost
     total_cost = sum(water_costs)
     
-    # Create figure with bar chart
-    fig = go.Figure()
-    
-    # Add bar chart with single color
-    fig.add_trace(go.Bar(
-        x=water_devices,
-        y=water_costs,
-        marker_color=COLORS["dark_blue"],
-        hovertemplate='%{x}: %{y:.0f} kr.<extra></extra>'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=f"Heitavatnsnotkun - Samtals: {total_cost:.0f} kr.",
-        # xaxis_title="Notkun",
-        yaxis_title="Kostnaður (kr.)",
-        height=500,
-        paper_bgcolor="rgba(255,255,255,0.5)",
-        title_font_color=COLORS["dark_gray"],
-        title_font_size=20,
-        xaxis_tickangle=-30,
-        plot_bgcolor='white',
-        font=dict(
-            family="Arial, sans-serif",
-            size=17,  # Larger font for axis labels and tick labels
-            color="black"
+    # Create figure with a single-color bar chart, passing the trace
+    # and layout in one construction instead of add_trace + update_layout
+    fig = go.Figure(
+        data=[go.Bar(
+            x=water_devices,
+            y=water_costs,
+            marker_color=COLORS["dark_blue"],
+            hovertemplate='%{x}: %{y:.0f} kr.<extra></extra>'
+        )],
+        layout=dict(
+            title=f"Heitavatnsnotkun - Samtals: {total_cost:.0f} kr.",
+            # xaxis_title="Notkun",
+            yaxis_title="Kostnaður (kr.)",
+            height=500,
+            paper_bgcolor="rgba(255,255,255,0.5)",
+            title_font_color=COLORS["dark_gray"],
+            title_font_size=20,
+            xaxis_tickangle=-30,
+            plot_bgcolor='white',
+            font=dict(
+                family="Arial, sans-serif",
+                size=17,  # Larger font for axis labels and tick labels
+                color="black"
+            )
         )
     )
     
@@ -373,6 +371,11 @@ def display_comparison_metrics(avg_cost, neighborhood_avg, home_type_avg, is_ele
         days = 30
         total_period_cost = float(avg_cost) * days
     
+    # Average cost per day for comparison (average_line_traces returns a scalar)
+    avg_daily_cost = float(avg_cost)
+    diff_pct_n = ((avg_daily_cost / neighborhood_avg) - 1) * 100
+    diff_pct_h = ((avg_daily_cost / home_type_avg) - 1) * 100
+    
     # Total cost for the period
     with col1:
         st.metric(
@@ -382,9 +385,7 @@ def display_comparison_metrics(avg_cost, neighborhood_avg, home_type_avg, is_ele
     
     # Comparison with neighborhood average
     with col2:
-        # Calculate average cost per day for comparison
-        avg_daily_cost = float(avg_cost.mean()) if hasattr(avg_cost, 'mean') else float(avg_cost)
-        diff_pct = ((avg_daily_cost / neighborhood_avg) - 1) * 100
+        diff_pct = diff_pct_n
         # Format the percentage with the arrow inline and color
         if diff_pct > 0:
             sign = "+"
@@ -403,9 +404,7 @@ def display_comparison_metrics(avg_cost, neighborhood_avg, home_type_avg, is_ele
     
     # Comparison with home type average
     with col3:
-        # Calculate average cost per day for comparison
-        avg_daily_cost = float(avg_cost.mean()) if hasattr(avg_cost, 'mean') else float(avg_cost)
-        diff_pct = ((avg_daily_cost / home_type_avg) - 1) * 100
+        diff_pct = diff_pct_h
         # Format the percentage with the arrow inline and color
         if diff_pct > 0:
             sign = "+"
@@ -428,21 +427,14 @@ def display_time_grain_selector(chart_type="electricity"):
     Args:
         chart_type: Type of chart ("electricity" or "water") to create unique key
     """
-    # Radio buttons for time grain selection
-    time_grain_options = {
-        "daily": "Daglegt",
-        "weekly": "Vikulegt",
-        "monthly": "Mánaðarlegt"
-    }
-    
     # Create a unique key for each chart type
     radio_key = f"time_grain_radio_{chart_type}"
     
     selected_time_grain = st.radio(
         "",
-        options=list(time_grain_options.keys()),
-        format_func=lambda x: time_grain_options[x],
-        index=list(time_grain_options.keys()).index(st.session_state.time_grain),
+        options=_TIME_GRAIN_KEYS,
+        format_func=lambda k: _TIME_GRAIN_LABELS[k],
+        index=_TIME_GRAIN_INDEX[st.session_state.time_grain],
         horizontal=True,
         key=radio_key
     )
@@ -450,20 +442,28 @@ def display_time_grain_selector(chart_type="electricity"):
     # Update session state if selection changed
     if selected_time_grain != st.session_state.time_grain:
         st.session_state.time_grain = selected_time_grain
-        st.rerun()
+        st.rerun()  # Full app rerun, since the data is aggregated outside the tab fragments
 
 def display_energy_breakdown_chart(df):
     """Display energy and water breakdown charts side by side"""    
+    # Read the sidebar toggles the breakdown charts depend on
+    # (sub-options of disabled toggles are passed as None, as in generate_data,
+    # so they don't split the chart caches)
+    has_hot_tub = st.session_state.get('has_hot_tub', False)
+    hot_tub_type = st.session_state.get('hot_tub_type', 'geothermal') if has_hot_tub else None
+    has_ev = st.session_state.get('has_ev', False)
+    ev_charging_time = st.session_state.get('ev_charging_time', 'day') if has_ev else None
+    
     # Create two columns for the charts with some gap between them
     col1, gap, col2 = st.columns([10, 1, 10])
     
     # Electricity usage in the first column
     with col1:
         # Create the electricity chart
-        fig_energy_breakdown = create_energy_breakdown_chart(df)
+        fig_energy_breakdown = create_energy_breakdown_chart(has_hot_tub, hot_tub_type, has_ev, ev_charging_time)
         
         # Display the chart
-        st.plotly_chart(fig_energy_breakdown, use_container_width=True)
+        st.plotly_chart(fig_energy_breakdown, use_container_width=True, key="energy_breakdown", config=STATIC_CHART_CONFIG)
         
         # Add explanatory text
         # st.markdown("""
@@ -474,10 +474,10 @@ def display_energy_breakdown_chart(df):
     # Hot water usage in the second column
     with col2:
         # Create the hot water chart
-        fig_water_breakdown = create_water_breakdown_chart(df)
+        fig_water_breakdown = create_water_breakdown_chart(has_hot_tub, hot_tub_type)
         
         # Display the chart
-        st.plotly_chart(fig_water_breakdown, use_container_width=True)
+        st.plotly_chart(fig_water_breakdown, use_container_width=True, key="water_breakdown", config=STATIC_CHART_CONFIG)
         
         # Add explanatory text
         # st.markdown("""
@@ -494,7 +494,7 @@ def display_electricity_chart(df):
     fig_cost_elec, avg_cost, neighborhood_avg, home_type_avg = create_electricity_chart(df)
     
     # Display chart
-    st.plotly_chart(fig_cost_elec, use_container_width=True)
+    st.plotly_chart(fig_cost_elec, use_container_width=True, key="electricity_cost")
     
     # Display comparison metrics
     display_comparison_metrics(avg_cost, neighborhood_avg, home_type_avg, is_electricity=True, df=df)
@@ -508,7 +508,7 @@ def display_water_chart(df):
     fig_cost_water, avg_cost, neighborhood_avg, home_type_avg = create_water_chart(df)
     
     # Display chart
-    st.plotly_chart(fig_cost_water, use_container_width=True)
+    st.plotly_chart(fig_cost_water, use_container_width=True, key="water_cost")
     
     # Display comparison metrics
     display_comparison_metrics(avg_cost, neighborhood_avg, home_type_avg, is_electricity=False, df=df)
@@ -1,36 +1,49 @@
 import streamlit as st
-from datetime import date, timedelta
-import plotly.graph_objects as go
+from datetime import date
 
 # Import from our utility modules
-from utils import generate_data, aggregate_by_time_period, COLORS, get_last_full_month
-from charts import *
+from utils import generate_data, aggregate_by_time_period, get_last_full_month
+from charts import display_electricity_chart, display_water_chart, display_energy_breakdown_chart
 from sidebar import display_sidebar
 
+# Each tab is a fragment, so interacting with widgets inside a tab only reruns
+# that tab, except the time grain selector, which forces a full app rerun
+@st.fragment
+def render_breakdown_tab(df):
+    """Render the energy usage breakdown tab"""
+    display_energy_breakdown_chart(df)
+
+@st.fragment
+def render_electricity_tab(df):
+    """Render the electricity cost tab"""
+    display_electricity_chart(df)
+
+@st.fragment
+def render_water_tab(df):
+    """Render the hot water cost tab"""
+    display_water_chart(df)
+
 def main():
     """Main app function"""
     st.set_page_config(page_title="Orkunotkun", layout="wide")
     
-    # Check if we need to rerun the app due to preference changes
-    if 'force_rerun' in st.session_state and st.session_state.force_rerun:
-        # Reset the flag and rerun
-        st.session_state.force_rerun = False
-        st.rerun()
-    
     # Add logo to the sidebar
     st.logo("Veitur-logo/VEITUR_Merki_02.png", size="large", link=None, icon_image="Veitur-logo/VEITUR_Merki_01.png")
     
     # Display the title in the main area
     st.title("Orkuvitund")
     
+    # Use one "today" for the whole run, so everything agrees around midnight
+    today = date.today()
+    
     # Date inputs in main page - using 4 columns with date pickers in the middle two
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         # Set start date to first day of last month
-        last_month = get_last_full_month()
-        start_date = st.date_input("Frá:", date(last_month.year, last_month.month, 1), max_value="today")
+        last_month = get_last_full_month(today)
+        start_date = st.date_input("Frá:", date(last_month.year, last_month.month, 1), max_value=today)
     with col2:
-        end_date = st.date_input("Til:", date.today(), max_value="today")
+        end_date = st.date_input("Til:", today, max_value=today)
     
     if start_date > end_date:
         st.error("Upphafsdagur má ekki vera eftir lokadag.")
@@ -40,7 +53,7 @@ def main():
     df = generate_data(start_date, end_date)
     
     # Display sidebar with costs and user preferences
-    display_sidebar(df)
+    display_sidebar(df, today=today)
     
     # Initialize session state for time grain if not exists
     if 'time_grain' not in st.session_state:
@@ -55,14 +68,14 @@ def main():
     
     # Display charts in their respective tabs
     with tab2:
-        display_electricity_chart(aggregated_df)
+        render_electricity_tab(aggregated_df)
         
     with tab3:
-        display_water_chart(aggregated_df)
+        render_water_tab(aggregated_df)
 
     # Energy usage breakdown (both electricity and hot water)
     with tab1:
-        display_energy_breakdown_chart(aggregated_df)
+        render_breakdown_tab(aggregated_df)
 
 if __name__ == "__main__":
     main()
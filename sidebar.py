@@ -1,14 +1,13 @@
 import streamlit as st
 import pandas as pd
-import streamlit as st
+import numpy as np
 from datetime import date, timedelta
 from utils import (
     format_date_icelandic,
     get_last_full_month,
-    get_current_month_costs,
     get_last_month_costs,
-    get_monthly_costs,
-    calculate_monthly_costs
+    get_month_cost_index,
+    ICELANDIC_MONTHS_ARR
 )
 
 # Date inputs moved to main page
@@ -17,38 +16,28 @@ def on_hot_tub_change():
     """Callback when hot tub toggle changes"""
     # Update session state from the toggle key
     st.session_state.has_hot_tub = st.session_state.hot_tub_toggle
-    # Force rerun to update data immediately
-    st.session_state.force_rerun = True
 
 def on_hot_tub_type_change():
     """Callback when hot tub type changes"""
     # Update session state based on selection
     selection = st.session_state.hot_tub_type_radio
     st.session_state.hot_tub_type = "geothermal" if selection == "Hitaveita" else "electric"
-    # Force rerun to update data immediately
-    st.session_state.force_rerun = True
 
 def on_ev_change():
     """Callback when EV toggle changes"""
     # Update session state from the toggle key
     st.session_state.has_ev = st.session_state.ev_toggle
-    # Force rerun to update data immediately
-    st.session_state.force_rerun = True
     
 def on_ev_charging_time_change():
     """Callback when EV charging time option changes"""
     # Update session state based on selection
     selection = st.session_state.ev_charging_time_radio
     st.session_state.ev_charging_time = "night" if selection == "Hlaða eftir kl.22:00" else "day"
-    # Force rerun to update data immediately
-    st.session_state.force_rerun = True
 
 def on_heat_pump_change():
     """Callback when heat pump toggle changes"""
     # Update session state from the toggle key
     st.session_state.has_heat_pump = st.session_state.heat_pump_toggle
-    # Force rerun to update data immediately
-    st.session_state.force_rerun = True
 
 def display_user_preferences():
     """Display user preference toggles in the sidebar"""
@@ -65,8 +54,6 @@ def display_user_preferences():
         st.session_state.ev_charging_time = "day"
     if 'has_heat_pump' not in st.session_state:
         st.session_state.has_heat_pump = False
-    if 'force_rerun' not in st.session_state:
-        st.session_state.force_rerun = False
     
     # Add toggle for hot tub with callback
     st.sidebar.toggle(
@@ -116,43 +103,39 @@ def display_user_preferences():
     # Add separator before monthly breakdown
     st.sidebar.markdown("---")
 
-def calculate_percentage_change(current, previous):
-    """Calculate percentage change between two values"""
-    if previous == 0:
-        return 0  # Avoid division by zero
-    return ((current / previous) - 1) * 100
-
-def format_percentage_change(percentage):
-    """Format percentage change with arrow and color"""
-    if percentage > 0:
-        return f"<span style='color:#BE2425'>↑ {abs(percentage):.1f}%</span>"
-    elif percentage < 0:
-        return f"<span style='color:#0E8CA6'>↓ {abs(percentage):.1f}%</span>"
-    else:
-        return "0%"
+def format_percentage_changes(percentages):
+    """Format a series of percentage changes with arrow and color (empty where missing)"""
+    magnitude = percentages.abs().map("{:.1f}%".format)
+    formatted = np.where(
+        percentages > 0,
+        "<span style='color:#BE2425'>↑ " + magnitude + "</span>",
+        np.where(percentages < 0, "<span style='color:#0E8CA6'>↓ " + magnitude + "</span>", "0%")
+    )
+    return pd.Series(formatted, index=percentages.index).where(percentages.notna(), "")
 
-def display_current_and_last_month_costs(df):
-    """Display current and last month costs in the sidebar"""
+def display_current_and_last_month_costs(monthly, today=None):
+    """Display current and last month costs in the sidebar
+    
+    Args:
+        monthly: Monthly cost totals indexed by month period (see get_month_cost_index)
+        today: Reference day, defaults to date.today()
+    """
+    today = today or date.today()
+    
     st.sidebar.title("Kostnaður")
     
     # Get last month's costs
-    last_month = get_last_full_month()
+    last_month = get_last_full_month(today)
     last_month_name = format_date_icelandic(last_month)
     
-    # Get costs for last month - use the provided df for consistency with the main chart
-    # Filter the dataframe to only include last month's data
-    last_month_data = df[
-        (df["date"].dt.year == last_month.year) & 
-        (df["date"].dt.month == last_month.month)
-    ]
+    # Get costs for last month - use the provided data for consistency with the main chart
+    last_month_period = pd.Period(last_month, freq="M")
     
-    if len(last_month_data) > 0:
-        last_month_elec = last_month_data["elec_total"].sum()
-        last_month_water = last_month_data["water_total"].sum()
-        last_month_total = last_month_elec + last_month_water
+    if last_month_period in monthly.index:
+        last_month_elec, last_month_water, last_month_total = monthly.loc[last_month_period]
     else:
         # Fallback if no data for last month in the filtered dataframe
-        last_month_total, last_month_elec, last_month_water = get_last_month_costs(None)
+        last_month_total, last_month_elec, last_month_water = get_last_month_costs(None, today)
     
     # Display last month costs
     st.sidebar.header(f"{last_month_name.title()}")
@@ -176,9 +159,14 @@ def display_current_and_last_month_costs(df):
     )
     
     # Get current month costs
-    current_month = date.today()
+    current_month = today
     current_month_name = format_date_icelandic(current_month)
-    current_month_total, current_month_elec, current_month_water = get_current_month_costs(df)
+    current_month_period = pd.Period(current_month, freq="M")
+    
+    if current_month_period in monthly.index:
+        current_month_elec, current_month_water, current_month_total = monthly.loc[current_month_period]
+    else:
+        current_month_total, current_month_elec, current_month_water = 0, 0, 0
     
     # Display current month costs
     st.sidebar.header(f"{current_month_name.title()} (það sem af er)")
@@ -204,50 +192,43 @@ def display_current_and_last_month_costs(df):
     # Add separator before monthly breakdown
     st.sidebar.markdown("---")
 
-def display_monthly_cost_overview(df):
-    """Display monthly cost breakdown in the sidebar"""
+def display_monthly_cost_overview(monthly):
+    """Display monthly cost breakdown in the sidebar
+    
+    Args:
+        monthly: Monthly cost totals indexed by month period (see get_month_cost_index)
+    """
     st.sidebar.subheader("Mánaðarleg sundurliðun")
     
-    # Get monthly costs
-    monthly_costs = calculate_monthly_costs(df)
+    # Sort monthly costs in descending order (a reversed view, no columns are added to it)
+    sorted_costs = monthly.iloc[::-1]
     
-    # Sort monthly costs by year and month in descending order
-    sorted_costs = monthly_costs.sort_values(["year", "month"], ascending=False)
+    # Calculate and format percentage changes against the previous month in one pass per column
+    # (rows are newest first, so the previous month is the next row; the oldest month has none)
+    changes = {}
+    for col in ("total", "elec_total", "water_total"):
+        previous = sorted_costs[col].shift(-1)
+        pct = ((sorted_costs[col] / previous) - 1).where(previous != 0, 0).where(previous.notna()) * 100
+        changes[col] = format_percentage_changes(pct)
     
-    # Create a dictionary to store previous month's data for comparison
-    previous_data = {}
+    # Month labels for all rows in one gather
+    month_names = ICELANDIC_MONTHS_ARR[sorted_costs.index.month]
     
-    # Display monthly costs
-    for i, (_, row) in enumerate(sorted_costs.iterrows()):
-        month_year = f"{row['month_name']} {row['year']}"
-        total = row['total']
-        elec = row['elec_total']
-        water = row['water_total']
-        
-        # Get previous month's data for comparison (if available)
-        if i < len(sorted_costs) - 1:
-            prev_row = sorted_costs.iloc[i + 1]
-            prev_total = prev_row['total']
-            prev_elec = prev_row['elec_total']
-            prev_water = prev_row['water_total']
-            
-            # Calculate percentage changes
-            total_change_pct = calculate_percentage_change(total, prev_total)
-            elec_change_pct = calculate_percentage_change(elec, prev_elec)
-            water_change_pct = calculate_percentage_change(water, prev_water)
-            
-            # Format percentage changes
-            total_change_formatted = format_percentage_change(total_change_pct)
-            elec_change_formatted = format_percentage_change(elec_change_pct)
-            water_change_formatted = format_percentage_change(water_change_pct)
-        else:
-            # No previous month data available
-            total_change_formatted = ""
-            elec_change_formatted = ""
-            water_change_formatted = ""
+    # Build the HTML for all months and display it in a single markdown call,
+    # walking the columns directly rather than building a Series per row
+    html_parts = []
+    for (
+        month_name, year, total, elec, water,
+        total_change_formatted, elec_change_formatted, water_change_formatted
+    ) in zip(
+        month_names, sorted_costs.index.year,
+        sorted_costs['total'], sorted_costs['elec_total'], sorted_costs['water_total'],
+        changes['total'], changes['elec_total'], changes['water_total']
+    ):
+        month_year = f"{month_name} {year}"
         
         # Use HTML for better formatting and smaller font
-        st.sidebar.markdown(f"""
+        html_parts.append(f"""
         <div style='border-bottom: 1px solid #eee; padding-bottom: 8px; margin-bottom: 8px;'>
             <div style='font-weight: bold;'>{month_year}</div>
             <div style='font-size: 14px;'>Heildarkostnaður: {total:,.0f} kr. {total_change_formatted}</div>
@@ -256,10 +237,20 @@ def display_monthly_cost_overview(df):
                 Heitt vatn: {water:,.0f} kr. {water_change_formatted}
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
+    
+    st.sidebar.markdown("\n".join(html_parts), unsafe_allow_html=True)
 
-def display_sidebar(df):
-    """Display all cost and user preference information in the sidebar"""
-    # display_current_and_last_month_costs(df)
+def display_sidebar(df, today=None):
+    """Display all cost and user preference information in the sidebar
+    
+    Args:
+        df: Daily cost data
+        today: Reference day for the current/last month section, defaults to date.today()
+    """
+    # Sum costs per month once and share it between the sidebar sections
+    monthly = get_month_cost_index(df)
+    
+    # display_current_and_last_month_costs(monthly, today)
     display_user_preferences()
-    display_monthly_cost_overview(df)
+    display_monthly_cost_overview(monthly)
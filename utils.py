@@ -2,11 +2,7 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 from datetime import date, timedelta
-import random
-
-# Set fixed seeds for reproducibility
-np.random.seed(42)
-random.seed(42)
+from functools import lru_cache
 
 # --- Icelandic localization ---
 ICELANDIC_MONTHS = {
@@ -21,9 +17,15 @@ ICELANDIC_MONTHS_SHORT = {
     9: "sep", 10: "okt", 11: "nóv", 12: "des"
 }
 
+# Month names indexed by month number (index 0 is unused): a tuple for single
+# lookups and an array so whole columns of month numbers can be translated with one gather
+ICELANDIC_MONTHS_TUPLE = ("",) + tuple(ICELANDIC_MONTHS[m] for m in range(1, 13))
+ICELANDIC_MONTHS_ARR = np.array(ICELANDIC_MONTHS_TUPLE)
+
 def get_icelandic_month(month_num):
-    return ICELANDIC_MONTHS.get(month_num, "")
+    return ICELANDIC_MONTHS_TUPLE[month_num] if 1 <= month_num <= 12 else ""
 
+@lru_cache(maxsize=64)
 def format_date_icelandic(d):
     month_name = get_icelandic_month(d.month)
     return f"{month_name} {d.year}"
@@ -58,8 +60,6 @@ HOT_WATER_UNIT_COST = 150  # Increased from 20 to make usage cost higher than ta
 TAX_RATE = 0.10
 
 # Fixed daily adjustments for user preferences
-EV_DAILY_KWH = 20.0  # 10 kWh per day for EV (day charging)
-EV_NIGHT_DAILY_KWH = 20.0  # 10 kWh per day for EV (night charging)
 EV_DAY_COST_MULTIPLIER = 2.2  # Regular cost for day charging
 EV_NIGHT_COST_MULTIPLIER = 1.5  # 30% discount for night charging
 ELECTRIC_HOT_TUB_DAILY_KWH = 8.0  # 8 kWh per day for electric hot tub
@@ -97,161 +97,144 @@ WATER_CATEGORIES = {
     # Total: 600.0 m³ (100%)
 }
 
+ENERGY_COLS = list(ENERGY_CATEGORIES)
+TOTAL_ENERGY = sum(ENERGY_CATEGORIES.values())
+
+# Seasonal usage factors indexed by month number, 1 (janúar) to 12 (desember); index 0 is unused
+# Higher in winter (des-feb), a bit higher in fall and spring (mar-apr, okt-nóv)
+ELEC_SEASONAL_FACTORS = np.array([1.0, 1.5, 1.5, 1.2, 1.2, 1.0, 1.0, 1.0, 1.0, 1.0, 1.2, 1.2, 1.5])
+WATER_SEASONAL_FACTORS = np.array([1.0, 1.3, 1.3, 1.1, 1.1, 1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 1.1, 1.3])
+# Higher in summer (jún-ágú)
+SUMMER_FACTORS = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.2, 1.2, 1.2, 1.0, 1.0, 1.0, 1.0])
+
+# How long cached data stays valid (seconds)
+CACHE_TTL = 24 * 60 * 60
+
 # --- Data generation and processing ---
 def generate_data(start_date, end_date):
     """Generate sample data for the given date range"""
+    # Get user preferences from session state
+    # (sub-options of disabled toggles are passed as None, so changing them
+    # doesn't cause a cache miss for identical data)
+    has_hot_tub = st.session_state.get('has_hot_tub', False)
+    hot_tub_type = st.session_state.get('hot_tub_type', 'geothermal') if has_hot_tub else None
+    has_ev = st.session_state.get('has_ev', False)
+    ev_charging_time = st.session_state.get('ev_charging_time', 'day') if has_ev else None
+    has_heat_pump = st.session_state.get('has_heat_pump', False)
+    
+    return _generate_data(start_date, end_date, has_hot_tub, hot_tub_type, has_ev, ev_charging_time, has_heat_pump)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _generate_data(start_date, end_date, has_hot_tub, hot_tub_type, has_ev, ev_charging_time, has_heat_pump):
+    """Generate sample data for the given date range and user preferences
+    
+    Cached on all inputs, so reruns that don't change the dates or toggles skip generation.
+    """
+    # Seeded generator per call, so the same inputs always give the same data,
+    # also after a cache miss
+    rng = np.random.default_rng(42)
+    
     # Create date range
     date_range = pd.date_range(start=start_date, end=end_date)
-    date_key = f"{start_date}_{end_date}"
-    
-    # Create dataframe with dates
-    df = pd.DataFrame({"date": date_range})
+    days_in_period = len(date_range)
     
     # Add seasonal variations
     # Higher in winter, lower in summer
-    df["month"] = df["date"].dt.month
-    winter_elec_factor = np.where(df["month"].isin([12, 1, 2]), 1.5, 1.0)
-    fall_spring_elec_factor = np.where(df["month"].isin([3, 4, 10, 11]), 1.2, 1.0)
-    winter_water_factor = np.where(df["month"].isin([12, 1, 2]), 1.3, 1.0)
-    fall_spring_water_factor = np.where(df["month"].isin([3, 4, 10, 11]), 1.1, 1.0)
+    month = date_range.month.to_numpy()
+    elec_seasonal_factor = ELEC_SEASONAL_FACTORS[month]
+    water_seasonal_factor = WATER_SEASONAL_FACTORS[month]
     
-    # Get user preferences from session state
-    has_hot_tub = st.session_state.get('has_hot_tub', False)
-    hot_tub_type = st.session_state.get('hot_tub_type', 'geothermal') if has_hot_tub else None
-    has_ev = st.session_state.get('has_ev', False)
-    has_heat_pump = st.session_state.get('has_heat_pump', False)
+    # Base values are drawn first, so they only depend on the date range and
+    # stay the same when toggles change
+    # Base electricity usage (kWh)
+    base_elec = rng.normal(15, 3, days_in_period) * elec_seasonal_factor
     
-    # Store base values in session state to avoid re-randomizing when toggles change
-    # Only generate new random values if date range changes or if base values don't exist
-    if 'base_data' not in st.session_state or st.session_state.get('date_key', '') != date_key:
-        # Base electricity usage (kWh)
-        base_elec = np.random.normal(15, 3, len(df)) * winter_elec_factor * fall_spring_elec_factor
-        
-        # Base hot water usage (m3) - reduced since we increased the unit cost
-        base_water = np.random.normal(0.3, 0.05, len(df)) * winter_water_factor * fall_spring_water_factor
-        
-        # Store in session state
-        st.session_state['base_data'] = {
-            'base_elec': base_elec,
-            'base_water': base_water
-        }
-        st.session_state['date_key'] = date_key
-    else:
-        # Use stored values
-        base_elec = st.session_state['base_data']['base_elec']
-        base_water = st.session_state['base_data']['base_water']
+    # Base hot water usage (m3) - reduced since we increased the unit cost
+    base_water = rng.normal(0.3, 0.05, days_in_period) * water_seasonal_factor
     
     # Apply fixed daily adjustments based on user preferences
+    # (constant per day, so scalars that broadcast against the daily arrays)
     # Check for EV and charging time preference
-    ev_charging_time = st.session_state.get('ev_charging_time', 'day')
-    
+    # (the EV usage itself is the energy_ev category below)
     if has_ev:
         if ev_charging_time == 'night':
             # Night charging - same kWh but lower cost multiplier
-            ev_usage = np.ones(len(df)) * EV_NIGHT_DAILY_KWH
             ev_cost_multiplier = EV_NIGHT_COST_MULTIPLIER
         else:
             # Day charging - regular cost
-            ev_usage = np.ones(len(df)) * EV_DAILY_KWH
             ev_cost_multiplier = EV_DAY_COST_MULTIPLIER
     else:
-        ev_usage = 0
         ev_cost_multiplier = 1.0
     
-    electric_hot_tub_usage = np.ones(len(df)) * ELECTRIC_HOT_TUB_DAILY_KWH if has_hot_tub and hot_tub_type == 'electric' else 0
-    geothermal_hot_tub_usage = np.ones(len(df)) * GEOTHERMAL_HOT_TUB_DAILY_M3 if has_hot_tub and hot_tub_type == 'geothermal' else 0
-    elec_reduction = np.ones(len(df)) * HEAT_PUMP_ELEC_REDUCTION_KWH if has_heat_pump else 0
-    water_reduction = np.ones(len(df)) * HEAT_PUMP_WATER_REDUCTION_M3 if has_heat_pump else 0
+    electric_hot_tub_usage = ELECTRIC_HOT_TUB_DAILY_KWH if has_hot_tub and hot_tub_type == 'electric' else 0.0
+    geothermal_hot_tub_usage = GEOTHERMAL_HOT_TUB_DAILY_M3 if has_hot_tub and hot_tub_type == 'geothermal' else 0.0
+    elec_reduction = HEAT_PUMP_ELEC_REDUCTION_KWH if has_heat_pump else 0.0
+    water_reduction = HEAT_PUMP_WATER_REDUCTION_M3 if has_heat_pump else 0.0
     
     # Add energy usage categories
     # EV and hot tub are conditional on user preferences
-    # Calculate daily values by dividing the total by the number of days in the period
-    days_in_period = len(df)
-    
-    # Handle EV and hot tub based on user preferences
-    if has_ev:
-        df["energy_ev"] = ENERGY_CATEGORIES["energy_ev"] / days_in_period * np.random.uniform(0.8, 1.2, len(df))
-    else:
-        df["energy_ev"] = 0
-        
-    if has_hot_tub and hot_tub_type == 'electric':
-        df["energy_hot_tub"] = ENERGY_CATEGORIES["energy_hot_tub"] / days_in_period * np.random.uniform(0.8, 1.2, len(df))
-    else:
-        df["energy_hot_tub"] = 0
-    
-    # Add random variation to each category (±20%)
-    for category, total_value in ENERGY_CATEGORIES.items():
-        # Skip EV and hot tub as they're already handled
-        if category in ["energy_ev", "energy_hot_tub"]:
-            continue
-            
-        # Calculate daily base value
-        daily_base = total_value / days_in_period
-        
-        # Apply seasonal factors to some categories
-        seasonal_factor = 1.0
-        if category == "energy_heating":
-            # More heating in winter
-            seasonal_factor = winter_elec_factor * fall_spring_elec_factor
-        elif category == "energy_refrigerator" or category == "energy_freezer":
-            # Slightly more in summer (warmer ambient temperature)
-            summer_factor = np.where(df["month"].isin([6, 7, 8]), 1.2, 1.0)
-            seasonal_factor = summer_factor
-            
-        # Generate random variations around the base value
-        variation = np.random.uniform(0.8, 1.2, len(df))
-        df[category] = daily_base * variation * seasonal_factor
-        
-    # Normalize the values to ensure they sum exactly to the target total
-    energy_cols = [col for col in df.columns if col.startswith('energy_')]
-    total_energy = sum(ENERGY_CATEGORIES.values())
-    current_sum = df[energy_cols].sum().sum()
-    
-    # Apply scaling factor to make the sum match the target
-    if current_sum > 0:  # Avoid division by zero
-        scaling_factor = total_energy / current_sum
-        for col in energy_cols:
-            df[col] = df[col] * scaling_factor
-    
-    # Calculate final electricity usage as sum of all energy categories
-    df["elec_usage"] = base_elec - elec_reduction
+    # Calculate daily values by dividing the total by the number of days in the period,
+    # one column per category
+    daily_bases = np.array(list(ENERGY_CATEGORIES.values())) / days_in_period
+    
+    # Apply seasonal factors to some categories
+    seasonal = np.ones((days_in_period, len(ENERGY_COLS)))
+    # More heating in winter
+    seasonal[:, ENERGY_COLS.index("energy_heating")] = elec_seasonal_factor
+    # Slightly more in summer (warmer ambient temperature)
+    summer_factor = SUMMER_FACTORS[month]
+    seasonal[:, ENERGY_COLS.index("energy_refrigerator")] = summer_factor
+    seasonal[:, ENERGY_COLS.index("energy_freezer")] = summer_factor
+    
+    # Add random variation to each category (±20%) in a single draw
+    energy = daily_bases * rng.uniform(0.8, 1.2, (days_in_period, len(ENERGY_COLS))) * seasonal
+    
+    # EV and hot tub are only used if the user has them
+    if not has_ev:
+        energy[:, ENERGY_COLS.index("energy_ev")] = 0
+    if not (has_hot_tub and hot_tub_type == 'electric'):
+        energy[:, ENERGY_COLS.index("energy_hot_tub")] = 0
+    
+    # Electric hot tub usage is added directly to ensure it's properly reflected
+    energy, elec_usage, water_usage = _compute_usage(
+        energy,
+        base_elec,
+        base_water,
+        electric_hot_tub_usage - elec_reduction,
+        geothermal_hot_tub_usage - water_reduction
+    )
+    
+    # Collect the columns as plain arrays and create the dataframe once,
+    # instead of inserting them into it one by one
+    columns = {"date": date_range}
+    columns.update(zip(ENERGY_COLS, energy.T))
+    columns["elec_usage"] = elec_usage
     
     # Store EV usage separately to apply different cost multiplier
-    df["ev_usage"] = df["energy_ev"] if has_ev else 0
+    columns["ev_usage"] = columns["energy_ev"] if has_ev else 0
     
-    # Add all energy categories to the total electricity usage
-    # Including EV usage in the total electricity usage
-    for category in ENERGY_CATEGORIES.keys():
-        df["elec_usage"] += df[category]
-        
-    # Add electric hot tub usage directly to ensure it's properly reflected
-    if has_hot_tub and hot_tub_type == 'electric':
-        df["elec_usage"] += electric_hot_tub_usage
+    columns["water_usage"] = water_usage
     
-    # Ensure usage is never negative
-    df["elec_usage"] = df["elec_usage"].clip(lower=0)
+    # Add fixed costs (divided by days in month to get daily values)
+    columns["cost_fixed"] = DAILY_FIXED_COST
+    columns["cost_equalization"] = MONTHLY_EQUALIZATION / date_range.days_in_month.to_numpy()
     
-    # Calculate final hot water usage
-    df["water_usage"] = base_water + geothermal_hot_tub_usage - water_reduction
-    # Ensure usage is never negative
-    df["water_usage"] = df["water_usage"].clip(lower=0)
+    df = pd.DataFrame(columns)
     
-    # Add fixed costs (divided by days in month to get daily values)
-    days_in_month = pd.Series(df["date"].dt.daysinmonth)
-    df["cost_fixed"] = DAILY_FIXED_COST
-    df["cost_equalization"] = MONTHLY_EQUALIZATION / days_in_month
+    # Both utilities' totals include the same daily fixed costs, so add them up once
+    fixed_costs = DAILY_FIXED_COST + columns["cost_equalization"]
     
     # Calculate costs
     # For electricity, handle EV costs separately with the appropriate multiplier
     if has_ev:
         # Calculate non-EV electricity costs
-        df = compute_cost_columns(df, "elec_usage", ELECTRICITY_UNIT_COST, "elec", include_ev=False)
+        df = compute_cost_columns(df, "elec_usage", ELECTRICITY_UNIT_COST, "elec", include_ev=False, fixed_costs=fixed_costs)
         
         # Calculate EV costs with the appropriate multiplier
-        df = compute_ev_costs(df, "ev_usage", ELECTRICITY_UNIT_COST, ev_cost_multiplier)
+        df = compute_ev_costs(df, "ev_usage", ELECTRICITY_UNIT_COST, ev_cost_multiplier, fixed_costs=fixed_costs)
     else:
         # No EV, calculate normal electricity costs
-        df = compute_cost_columns(df, "elec_usage", ELECTRICITY_UNIT_COST, "elec")
+        df = compute_cost_columns(df, "elec_usage", ELECTRICITY_UNIT_COST, "elec", fixed_costs=fixed_costs)
         
     # Add a significant boost to electricity costs if electric hot tub is enabled
     if has_hot_tub and hot_tub_type == 'electric':
@@ -259,176 +242,266 @@ def generate_data(start_date, end_date):
         hot_tub_cost = electric_hot_tub_usage * ELECTRICITY_UNIT_COST * 1.5  # Higher cost multiplier
         hot_tub_tax = hot_tub_cost * TAX_RATE
         
-        # Add to the total electricity costs
-        df["elec_usage_cost"] += hot_tub_cost
-        df["elec_tax"] += hot_tub_tax
-        df["elec_total"] += hot_tub_cost + hot_tub_tax
+        # Add to the total electricity costs in one broadcast add
+        elec_cost_cols = ["elec_usage_cost", "elec_tax", "elec_total"]
+        df[elec_cost_cols] = df[elec_cost_cols].to_numpy() + [hot_tub_cost, hot_tub_tax, hot_tub_cost + hot_tub_tax]
     
     # Calculate water costs normally
-    df = compute_cost_columns(df, "water_usage", HOT_WATER_UNIT_COST, "water")
+    df = compute_cost_columns(df, "water_usage", HOT_WATER_UNIT_COST, "water", fixed_costs=fixed_costs)
     
-    return df
+    # Store as float32: plenty of precision for a dashboard, and half the bytes
+    # for every aggregation and chart that uses the data
+    float_cols = df.select_dtypes("float64").columns
+    df[float_cols] = df[float_cols].astype(np.float32)
+    
+    # The cost columns were added a group at a time, leaving one internal block per
+    # column. A copy consolidates them into one contiguous 2D block per dtype, which
+    # halves the pickling st.cache_data does on every cache hit
+    return df.copy()
+
+def _compute_usage(energy, base_elec, base_water, elec_adjustment, water_adjustment):
+    """Normalize the energy categories and calculate daily electricity and hot water usage
+    
+    Works on plain NumPy arrays only, so the numeric part of data generation
+    runs without pandas overhead.
+    
+    Args:
+        energy: Daily usage per energy category, shape (days, categories)
+        base_elec, base_water: Daily base usage
+        elec_adjustment, water_adjustment: Daily (or scalar) additions from user preferences
+    
+    Returns:
+        Tuple of (normalized energy, electricity usage, hot water usage)
+    """
+    # Normalize the values to ensure they sum exactly to the target total
+    # (scaled in place, the matrix is owned by the caller and not used unscaled)
+    current_sum = energy.sum()
+    if current_sum > 0:  # Avoid division by zero
+        energy *= TOTAL_ENERGY / current_sum
+    
+    # Final electricity usage is the base plus all energy categories (including EV)
+    elec_usage = base_elec + elec_adjustment + energy.sum(axis=1)
+    water_usage = base_water + water_adjustment
+    
+    # Ensure usage is never negative (clipped in place, both are fresh arrays)
+    np.maximum(elec_usage, 0, out=elec_usage)
+    np.maximum(water_usage, 0, out=water_usage)
+    
+    return energy, elec_usage, water_usage
 
-def compute_cost_columns(df, usage_col, unit_price, prefix, include_ev=True):
-    """Calculate cost components for a given usage column"""
+def _fixed_costs(df):
+    """Daily fixed plus equalization cost"""
+    return df["cost_fixed"].to_numpy() + df["cost_equalization"].to_numpy()
+
+def compute_cost_columns(df, usage_col, unit_price, prefix, include_ev=True, fixed_costs=None):
+    """Calculate cost components for a given usage column
+    
+    Args:
+        fixed_costs: Precomputed daily fixed plus equalization cost, taken from
+            the dataframe if not provided
+    """
+    if fixed_costs is None:
+        fixed_costs = _fixed_costs(df)
+    
     # Use the actual column name from the dataframe
-    usage = df[usage_col] * unit_price
+    usage = df[usage_col].to_numpy() * unit_price
     tax = usage * TAX_RATE
+    # Accumulate the total in place, in a single output array
+    total = np.add(usage, tax)
+    total += fixed_costs
     
     # If this is for electricity and we're excluding EV (because it's handled separately)
     if prefix == "elec" and not include_ev:
         # Store these as non-EV costs
-        df[f"{prefix}_usage_cost_non_ev"] = usage
-        df[f"{prefix}_tax_non_ev"] = tax
+        df[[f"{prefix}_usage_cost_non_ev", f"{prefix}_tax_non_ev"]] = np.column_stack([usage, tax])
         
         # Initialize total columns if they don't exist yet
         if f"{prefix}_usage_cost" not in df.columns:
-            df[f"{prefix}_usage_cost"] = usage
-            df[f"{prefix}_tax"] = tax
-            df[f"{prefix}_total"] = df["cost_fixed"] + df["cost_equalization"] + usage + tax
+            df[[f"{prefix}_usage_cost", f"{prefix}_tax", f"{prefix}_total"]] = np.column_stack([usage, tax, total])
     else:
         # Normal case (water or electricity without EV separation)
-        df[f"{prefix}_usage_cost"] = usage  # Renamed to avoid confusion with usage quantity
-        df[f"{prefix}_tax"] = tax
-        df[f"{prefix}_total"] = df["cost_fixed"] + df["cost_equalization"] + usage + tax
+        # "_usage_cost" is named to avoid confusion with usage quantity
+        df[[f"{prefix}_usage_cost", f"{prefix}_tax", f"{prefix}_total"]] = np.column_stack([usage, tax, total])
     
     return df
 
-def compute_ev_costs(df, ev_usage_col, unit_price, cost_multiplier):
-    """Calculate EV costs with the appropriate cost multiplier"""
+def compute_ev_costs(df, ev_usage_col, unit_price, cost_multiplier, fixed_costs=None):
+    """Calculate EV costs with the appropriate cost multiplier
+    
+    Args:
+        fixed_costs: Precomputed daily fixed plus equalization cost, taken from
+            the dataframe if not provided
+    """
+    if fixed_costs is None:
+        fixed_costs = _fixed_costs(df)
+    
     # Calculate EV usage cost with the multiplier
-    ev_usage_cost = df[ev_usage_col] * unit_price * cost_multiplier
+    ev_usage_cost = df[ev_usage_col].to_numpy() * (unit_price * cost_multiplier)
     ev_tax = ev_usage_cost * TAX_RATE
     
     # Add EV costs to the existing electricity costs
-    df["elec_usage_cost"] = df["elec_usage_cost_non_ev"] + ev_usage_cost
-    df["elec_tax"] = df["elec_tax_non_ev"] + ev_tax
-    df["elec_total"] = df["cost_fixed"] + df["cost_equalization"] + df["elec_usage_cost"] + df["elec_tax"]
+    usage_cost = df["elec_usage_cost_non_ev"].to_numpy() + ev_usage_cost
+    tax = df["elec_tax_non_ev"].to_numpy() + ev_tax
+    total = np.add(usage_cost, tax)
+    total += fixed_costs
+    df[["elec_usage_cost", "elec_tax", "elec_total"]] = np.column_stack([usage_cost, tax, total])
     
     # Store EV-specific costs for reference
-    df["ev_usage_cost"] = ev_usage_cost
-    df["ev_tax"] = ev_tax
+    df[["ev_usage_cost", "ev_tax"]] = np.column_stack([ev_usage_cost, ev_tax])
     
     return df
 
+# Aggregations used by aggregate_by_time_period
+_COST_AGG = {
+    "cost_fixed": "sum",
+    "cost_equalization": "sum",
+    "elec_usage_cost": "sum",
+    "elec_tax": "sum",
+    "elec_total": "sum",
+    "water_usage_cost": "sum",
+    "water_tax": "sum",
+    "water_total": "sum"
+}
+ENERGY_AGG = {col: "sum" for col in ENERGY_COLS}
+WEEKLY_AGG = {
+    "date": "first",  # Use first date of the week
+    "elec_usage": "sum",
+    "water_usage": "sum",
+    "ev_usage": "sum",
+    **_COST_AGG
+}
+# Only present when the user has an EV
+WEEKLY_OPTIONAL_COLS = ("ev_usage_cost", "ev_tax", "elec_usage_cost_non_ev", "elec_tax_non_ev")
+# The monthly date is the month's first day, taken from the group key
+MONTHLY_AGG = {
+    "elec_usage": "sum",
+    "water_usage": "sum",
+    **_COST_AGG,
+    **ENERGY_AGG
+}
+
+def df_fingerprint(df):
+    """Cheap content fingerprint of a cost dataframe, used as its cache hash"""
+    if len(df) == 0:
+        return (0,)
+    return (len(df), df["date"].iloc[0], df["date"].iloc[-1], float(df.select_dtypes("number").to_numpy().sum()))
+
 def aggregate_by_time_period(df, period):
     """Aggregate data by specified time period (daily, weekly, monthly)"""
-    # Make a copy to avoid modifying the original
-    agg_df = df.copy()
-    
-    # Get all energy category columns
-    energy_cols = [col for col in df.columns if col.startswith('energy_')]
-    
     if period == "daily":
-        # Daily data is already at the right grain
-        return agg_df
-    elif period == "weekly":
-        # Add week number
-        agg_df["year"] = agg_df["date"].dt.isocalendar().year
-        agg_df["week"] = agg_df["date"].dt.isocalendar().week
-        
+        # Daily data is already at the right grain, so skip the cache
+        # (hashing and copying the frame would cost more than it saves)
+        return df
+    return _aggregate_by_time_period(df, period)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs={pd.DataFrame: df_fingerprint})
+def _aggregate_by_time_period(df, period):
+    """Aggregate data by week or month, cached per dataframe and period"""
+    if period == "weekly":
         # Group by year and week
+        week = df["date"].dt.isocalendar()
+        
+        # Add EV-specific and non-EV electricity columns if they exist
         agg_dict = {
-            "date": "first",  # Use first date of the week
-            "elec_usage": "sum",
-            "water_usage": "sum",
-            "ev_usage": "sum",
-            "cost_fixed": "sum",
-            "cost_equalization": "sum",
-            "elec_usage_cost": "sum",
-            "elec_tax": "sum",
-            "elec_total": "sum",
-            "water_usage_cost": "sum",
-            "water_tax": "sum",
-            "water_total": "sum"
+            **WEEKLY_AGG,
+            **{col: "sum" for col in WEEKLY_OPTIONAL_COLS if col in df.columns},
+            **ENERGY_AGG
         }
-        
-        # Add EV-specific columns if they exist
-        if "ev_usage_cost" in agg_df.columns:
-            agg_dict["ev_usage_cost"] = "sum"
-            agg_dict["ev_tax"] = "sum"
             
-        # Add non-EV electricity columns if they exist
-        if "elec_usage_cost_non_ev" in agg_df.columns:
-            agg_dict["elec_usage_cost_non_ev"] = "sum"
-            agg_dict["elec_tax_non_ev"] = "sum"
-        
-        # Add energy category columns to aggregation
-        for col in energy_cols:
-            agg_dict[col] = "sum"
-            
-        grouped = agg_df.groupby(["year", "week"]).agg(agg_dict).reset_index()
+        grouped = df.groupby([week["year"], week["week"]]).agg(agg_dict).reset_index()
         
     elif period == "monthly":
-        # Add year and month
-        agg_df["year"] = agg_df["date"].dt.year
-        agg_df["month"] = agg_df["date"].dt.month
-        
-        # Group by year and month
-        agg_dict = {
-            "date": "first",  # Use first date of the month
-            "elec_usage": "sum",
-            "water_usage": "sum",
-            "cost_fixed": "sum",
-            "cost_equalization": "sum",
-            "elec_usage_cost": "sum",
-            "elec_tax": "sum",
-            "elec_total": "sum",
-            "water_usage_cost": "sum",
-            "water_tax": "sum",
-            "water_total": "sum"
-        }
+        # Group by month, using the first day of each month as a single datetime
+        # key, which groups faster than a (year, month) pair of integer keys.
+        # Kept in ns so the date column has the same dtype as the daily frame
+        month_start = df["date"].to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+        grouped = df.groupby(month_start).agg(MONTHLY_AGG)
         
-        # Add energy category columns to aggregation
-        for col in energy_cols:
-            agg_dict[col] = "sum"
-            
-        grouped = agg_df.groupby(["year", "month"]).agg(agg_dict).reset_index()
-        
-        # Set date to first day of month for proper display
-        grouped["date"] = grouped.apply(lambda row: pd.Timestamp(year=int(row["year"]), month=int(row["month"]), day=1), axis=1)
+        # Add year and month, and set date to first day of month for proper display
+        month_start = pd.DatetimeIndex(grouped.index)
+        grouped.insert(0, "year", month_start.year)
+        grouped.insert(1, "month", month_start.month)
+        grouped.insert(2, "date", month_start)
+        grouped = grouped.reset_index(drop=True)
     
     return grouped
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs={pd.DataFrame: df_fingerprint})
+def get_month_cost_index(df):
+    """Sum electricity, hot water and total costs per month in a single pass
+    
+    Cached per dataframe, since the sidebar asks for it on every rerun.
+    
+    Returns:
+        DataFrame indexed by month period with elec_total, water_total and total
+        columns, so costs for any month are a single index lookup
+    """
+    # Group on the month period without touching the input
+    monthly = df.groupby(df["date"].dt.to_period("M"), sort=True)[["elec_total", "water_total"]].sum()
+    monthly["total"] = monthly["elec_total"] + monthly["water_total"]
+    return monthly
+
 def get_monthly_costs(df):
     """Calculate monthly cost summaries"""
-    # Group by year and month
-    monthly = df.copy()
-    monthly["year"] = monthly["date"].dt.year
-    monthly["month"] = monthly["date"].dt.month
-    
     # Sum costs by month
-    monthly_costs = monthly.groupby(["year", "month"]).agg({
-        "elec_total": "sum",
-        "water_total": "sum"
-    }).reset_index()
+    monthly = get_month_cost_index(df)
+    
+    # Add year and month
+    monthly_costs = pd.DataFrame({
+        "year": monthly.index.year,
+        "month": monthly.index.month,
+        "elec_total": monthly["elec_total"].to_numpy(),
+        "water_total": monthly["water_total"].to_numpy()
+    })
     
     # Add total cost
     monthly_costs["total"] = monthly_costs["elec_total"] + monthly_costs["water_total"]
     
     # Add month name
-    monthly_costs["month_name"] = monthly_costs["month"].apply(get_icelandic_month)
-    
-    # Sort by date
-    monthly_costs = monthly_costs.sort_values(["year", "month"])
+    monthly_costs["month_name"] = ICELANDIC_MONTHS_ARR[monthly_costs["month"].to_numpy()]
     
     return monthly_costs
 
-def get_last_full_month():
-    """Get the last full month (previous month)"""
-    today = date.today()
+# Kept for backward compatibility, it used to be an identical copy of get_monthly_costs
+calculate_monthly_costs = get_monthly_costs
+
+def get_last_full_month(today=None):
+    """Get the last full month (previous month)
+    
+    Args:
+        today: Reference day, defaults to date.today()
+    """
+    return _last_full_month(today or date.today())
+
+@lru_cache(maxsize=64)
+def _last_full_month(today):
+    """Get the month before the given day, cached per day"""
     if today.month == 1:
         return date(today.year - 1, 12, 1)
     else:
         return date(today.year, today.month - 1, 1)
 
-def get_current_month_costs(df):
-    """Get costs for the current month"""
-    today = date.today()
-    current_month_data = df[
-        (df["date"].dt.year == today.year) & 
-        (df["date"].dt.month == today.month)
-    ]
+def get_month_slice(df, year, month, day_of_month=None):
+    """Get the rows of a date-sorted dataframe within a month, optionally up to a day of month
+    
+    Uses a binary search on the date column instead of building boolean masks.
+    """
+    start = np.datetime64(date(year, month, 1))
+    end = np.datetime64(date(year + (month == 12), month % 12 + 1, 1))
+    if day_of_month is not None:
+        end = min(end, start + np.timedelta64(day_of_month, "D"))
+    
+    i0, i1 = np.searchsorted(df["date"].to_numpy(), [start, end])
+    return df.iloc[i0:i1]
+
+def get_current_month_costs(df, today=None):
+    """Get costs for the current month
+    
+    Args:
+        today: Reference day, defaults to date.today()
+    """
+    today = today or date.today()
+    current_month_data = get_month_slice(df, today.year, today.month)
     
     if len(current_month_data) == 0:
         return 0, 0, 0
@@ -439,10 +512,17 @@ def get_current_month_costs(df):
     
     return total_cost, elec_cost, water_cost
 
-def generate_last_month_data():
-    """Generate data specifically for the last full month"""
+def generate_last_month_data(today=None):
+    """Generate data specifically for the last full month
+    
+    Goes through the cached generate_data, so repeated calls on the same day
+    with the same preferences don't regenerate anything.
+    
+    Args:
+        today: Reference day, defaults to date.today()
+    """
     # Get last month's date range
-    last_month = get_last_full_month()
+    last_month = get_last_full_month(today)
     
     # Create date range for the entire month
     if last_month.month == 12:
@@ -457,17 +537,19 @@ def generate_last_month_data():
     # Generate data for the full month
     return generate_data(start_date, end_date)
 
-def get_last_month_costs(df=None):
-    """Get costs for the last full month"""
+def get_last_month_costs(df=None, today=None):
+    """Get costs for the last full month
+    
+    Args:
+        df: Daily cost data, generated for the last month if not provided
+        today: Reference day, defaults to date.today()
+    """
     # If no dataframe is provided, generate data specifically for the last month
     if df is None:
-        df = generate_last_month_data()
+        df = generate_last_month_data(today)
     
-    last_month = get_last_full_month()
-    last_month_data = df[
-        (df["date"].dt.year == last_month.year) & 
-        (df["date"].dt.month == last_month.month)
-    ]
+    last_month = get_last_full_month(today)
+    last_month_data = get_month_slice(df, last_month.year, last_month.month)
     
     if len(last_month_data) == 0:
         return 0, 0, 0
@@ -478,20 +560,21 @@ def get_last_month_costs(df=None):
     
     return total_cost, elec_cost, water_cost
 
-def get_previous_month_costs(df):
-    """Get costs for the month before last month"""
+def get_previous_month_costs(df, today=None):
+    """Get costs for the month before last month
+    
+    Args:
+        today: Reference day, defaults to date.today()
+    """
     if df is None:
         # Fallback values if no data is provided
         return 11500, 7500, 4000
     
-    today = date.today()
-    last_month = today.replace(day=1) - timedelta(days=1)
-    previous_month_end = date(last_month.year, last_month.month, 1) - timedelta(days=1)
-    previous_month_start = date(previous_month_end.year, previous_month_end.month, 1)
+    last_month = get_last_full_month(today)
+    previous_month_end = last_month - timedelta(days=1)
     
     # Filter data for the month before last month
-    previous_month_data = df[(df['date'] >= pd.Timestamp(previous_month_start)) & 
-                            (df['date'] <= pd.Timestamp(previous_month_end))]
+    previous_month_data = get_month_slice(df, previous_month_end.year, previous_month_end.month)
     
     if len(previous_month_data) > 0:
         previous_month_elec = previous_month_data["elec_total"].sum()
@@ -504,11 +587,7 @@ def get_previous_month_costs(df):
 
 def get_month_to_date_costs(df, year, month, day_of_month):
     """Get costs for a specific month up to a specific day"""
-    month_to_date_data = df[
-        (df["date"].dt.year == year) & 
-        (df["date"].dt.month == month) &
-        (df["date"].dt.day <= day_of_month)
-    ]
+    month_to_date_data = get_month_slice(df, year, month, day_of_month)
     
     if len(month_to_date_data) == 0:
         return 0, 0, 0
@@ -519,28 +598,4 @@ def get_month_to_date_costs(df, year, month, day_of_month):
     
     return total_cost, elec_cost, water_cost
 
-def calculate_monthly_costs(df):
-    """Calculate costs by month without deltas"""
-    # Group by year and month
-    monthly = df.copy()
-    monthly["year"] = monthly["date"].dt.year
-    monthly["month"] = monthly["date"].dt.month
-    
-    # Sum costs by month
-    monthly_costs = monthly.groupby(["year", "month"]).agg({
-        "elec_total": "sum",
-        "water_total": "sum"
-    }).reset_index()
-    
-    # Add total cost
-    monthly_costs["total"] = monthly_costs["elec_total"] + monthly_costs["water_total"]
-    
-    # Add month name
-    monthly_costs["month_name"] = monthly_costs["month"].apply(get_icelandic_month)
-    
-    # Sort by date
-    monthly_costs = monthly_costs.sort_values(["year", "month"])
-    
-    return monthly_costs
-
 # Removed month comparison calculation functions